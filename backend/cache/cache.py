@@ -0,0 +1,265 @@
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError  # type: ignore
+from sqlalchemy.orm import Session  # type: ignore
+import importlib
+import json
+import os
+import time
+
+from db.models import CacheGeneration
+
+
+QUERY_CACHE_BACKEND = os.getenv("QUERY_CACHE_BACKEND", "memory")  # memory | none | module:Class
+QUERY_CACHE_GENERATIONS = os.getenv("QUERY_CACHE_GENERATIONS", "db")  # db | local
+QUERY_CACHE_TTL = int(os.getenv("QUERY_CACHE_TTL", "30"))  # seconds
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "1024"))
+QUERY_CACHE_MAX_BYTES = int(os.getenv("QUERY_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# generation namespaces, bumped by the handlers that change the data behind them
+POSTS = "posts"
+USERS = "users"
+
+
+class CacheBackend:
+    """Storage for serialized results"""
+
+    def get(self, key: str) -> bytes | None:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        raise NotImplementedError
+
+
+class NullCache(CacheBackend):
+    """Cache that stores nothing (QUERY_CACHE_BACKEND=none)"""
+
+    def __init__(self):
+        self.misses = 0
+
+    def get(self, key: str) -> bytes | None:
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": "none", "hits": 0, "misses": self.misses}
+
+
+class InMemoryCache(CacheBackend):
+    """In-process LRU with TTL, bounded by entries count and total size in bytes"""
+
+    def __init__(self, max_entries: int = QUERY_CACHE_MAX_ENTRIES, max_bytes: int = QUERY_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = Lock()
+
+    def _remove(self, key: str) -> None:
+        _, value = self.entries.pop(key)
+        self.size -= len(key) + len(value)
+
+    def get(self, key: str) -> bytes | None:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        entry_size = len(key) + len(value)
+        if entry_size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.size += entry_size
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        with self.lock:
+            requests = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / requests, 4) if requests else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class Generations:
+    """Generation counters of the namespaces. Every worker has to see the same
+    values, otherwise a write only invalidates the cache of the worker that handled it.
+    """
+
+    def setup(self, engine) -> None:
+        pass
+
+    def get(self, db, namespaces: tuple[str, ...]) -> list[int]:
+        raise NotImplementedError
+
+    def bump(self, db, namespace: str) -> None:
+        raise NotImplementedError
+
+
+class DatabaseGenerations(Generations):
+    """Counters in the cache_generations table, bumped inside the write transaction.
+
+    The bump is an UPDATE of the namespace row, which stays locked until the
+    write commits: all post writes (likes included) are serialized on that row.
+    They commit right after the bump, so the lock is short, but it caps the
+    write throughput of a namespace at one transaction at a time.
+    """
+
+    # Databases created before the table was added to db/01_init.sql don't have it
+    def setup(self, engine) -> None:
+        try:
+            CacheGeneration.__table__.create(engine, checkfirst=True)
+        except (OperationalError, ProgrammingError):
+            # another worker created it in the meantime
+            pass
+        with Session(engine) as db:
+            existing = {namespace for (namespace,) in db.query(CacheGeneration.namespace).all()}
+            for namespace in (POSTS, USERS):
+                if namespace not in existing:
+                    db.add(CacheGeneration(namespace=namespace, generation=0))
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+
+    def get(self, db, namespaces: tuple[str, ...]) -> list[int]:
+        rows = (
+            db.query(CacheGeneration.namespace, CacheGeneration.generation)
+            .filter(CacheGeneration.namespace.in_(namespaces))
+            .all()
+        )
+        generations = dict(rows)
+        return [generations.get(namespace, 0) for namespace in namespaces]
+
+    def bump(self, db, namespace: str) -> None:
+        updated = (
+            db.query(CacheGeneration)
+            .filter(CacheGeneration.namespace == namespace)
+            .update({CacheGeneration.generation: CacheGeneration.generation + 1}, synchronize_session=False)
+        )
+        if not updated:
+            db.add(CacheGeneration(namespace=namespace, generation=1))
+
+
+class LocalGenerations(Generations):
+    """In-process counters (QUERY_CACHE_GENERATIONS=local), only correct with a single worker"""
+
+    def __init__(self):
+        self.generations: dict[str, int] = {}
+        self.lock = Lock()
+
+    def get(self, db, namespaces: tuple[str, ...]) -> list[int]:
+        return [self.generations.get(namespace, 0) for namespace in namespaces]
+
+    def bump(self, db, namespace: str) -> None:
+        with self.lock:
+            self.generations[namespace] = self.generations.get(namespace, 0) + 1
+
+
+def _normalize(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class QueryCache:
+    """Result cache for read handlers.
+
+    Keys are built from the namespace generations and the normalized query
+    parameters, so bumping a generation makes every older entry unreachable
+    (they age out through the LRU / TTL). The entries live in the worker,
+    the generations are shared: a hit costs one primary key lookup.
+    """
+
+    def __init__(self, backend: CacheBackend, generations: Generations, ttl: int = QUERY_CACHE_TTL):
+        self.backend = backend
+        self.generations = generations
+        self.ttl = ttl
+
+    def make_key(self, db, namespace: str, params: dict, depends_on: tuple[str, ...] = ()) -> str:
+        # the generations have to be read before the query runs: a write that lands
+        # in between bumps one, and the stale result is stored under the old key
+        generation = ".".join(str(value) for value in self.generations.get(db, (namespace, *depends_on)))
+        normalized = {name: _normalize(value) for name, value in params.items() if value is not None}
+        return f"{namespace}:{generation}:" + json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+
+    def get(self, key: str) -> bytes | None:
+        return self.backend.get(key)
+
+    def set(self, key: str, value: bytes) -> None:
+        self.backend.set(key, value, self.ttl)
+
+    # call before db.commit(): the bump is committed together with the write
+    # (with DatabaseGenerations it also locks the namespace row until then)
+    def invalidate(self, db, *namespaces: str) -> None:
+        for namespace in namespaces:
+            self.generations.bump(db, namespace)
+
+    def stats(self) -> dict:
+        return self.backend.stats()
+
+
+# memory, none or "module:Class" of a CacheBackend subclass (e.g. a shared Redis/memcached one)
+def create_backend(name: str = QUERY_CACHE_BACKEND) -> CacheBackend:
+    if name == "memory":
+        return InMemoryCache()
+    if name == "none":
+        return NullCache()
+    if ":" in name:
+        module_name, class_name = name.split(":", 1)
+        return getattr(importlib.import_module(module_name), class_name)()
+    raise ValueError(f"Unknown query cache backend: {name}")
+
+
+def create_generations(name: str = QUERY_CACHE_GENERATIONS) -> Generations:
+    if name == "db":
+        return DatabaseGenerations()
+    if name == "local":
+        return LocalGenerations()
+    raise ValueError(f"Unknown query cache generations: {name}")
+
+
+query_cache = QueryCache(create_backend(), create_generations())
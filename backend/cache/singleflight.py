@@ -0,0 +1,103 @@
+from fastapi import HTTPException  # type: ignore
+from threading import Event, Lock
+from typing import Callable
+import copy
+import hashlib
+import logging
+import os
+
+
+logger = logging.getLogger(__name__)
+
+# how long a request waits for the shared query before running its own
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_TIMEOUT", "5"))  # seconds
+
+
+class _Call:
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error: BaseException | None = None
+        self.shared = 0
+
+
+# Every waiter gets its own exception object: raising the leader's one from
+# several threads would make them all rewrite the same __traceback__
+def _copy_error(error: BaseException) -> BaseException:
+    if isinstance(error, HTTPException):
+        return HTTPException(status_code=error.status_code, detail=error.detail, headers=error.headers)
+    try:
+        return copy.copy(error)
+    except Exception:
+        return RuntimeError(f"shared call failed: {error!r}")
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls: the first caller for a key runs the
+    loader, the callers arriving while it is in flight wait and get its result
+    (or a copy of its exception). A waiter that isn't answered within `timeout`
+    runs the loader itself, so a stuck query doesn't hold every coalesced thread.
+    Nothing is kept once the call has finished.
+    """
+
+    def __init__(self, timeout: float = SINGLE_FLIGHT_TIMEOUT):
+        self.timeout = timeout
+        self.calls: dict[str, _Call] = {}
+        self.lock = Lock()
+        self.executed = 0
+        self.shared = 0
+        self.timeouts = 0
+
+    def do(self, key: str, loader: Callable[[], bytes]) -> bytes:
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None:
+                call.shared += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self.calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            if not call.done.wait(self.timeout):
+                with self.lock:
+                    self.timeouts += 1
+                logger.warning("single-flight %s: no result after %ss, querying directly", key, self.timeout)
+                return loader()
+            if call.error is not None:
+                raise _copy_error(call.error) from None
+            return call.result
+
+        try:
+            call.result = loader()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "executed": self.executed,
+                "shared": self.shared,
+                "timeouts": self.timeouts,
+                "in_flight": len(self.calls),
+            }
+
+
+# Responses that depend on the caller must pass the caller as `viewer`,
+# so two users never share a result; public reads pass nothing
+def flight_key(key: str, viewer: str | None = None) -> str:
+    if viewer is None:
+        return key
+    return key + ":viewer:" + hashlib.sha256(viewer.encode()).hexdigest()
+
+
+single_flight = SingleFlight()
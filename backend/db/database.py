@@ -1,10 +1,20 @@
-from sqlalchemy import create_engine  # type: ignore
+from sqlalchemy import create_engine, text  # type: ignore
 from sqlalchemy.orm import sessionmaker, declarative_base  # type: ignore
 import os
 
 
 DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds
+
+engine = create_engine(
+    DATABASE_URL,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -15,3 +25,23 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Open `size` connections up front so the first requests don't pay for the handshake
+def warm_up_pool(size: int = DB_POOL_SIZE) -> int:
+    connections = []
+    try:
+        for _ in range(size):
+            conn = engine.connect()
+            conn.execute(text("SELECT 1"))
+            connections.append(conn)
+    finally:
+        for conn in connections:
+            conn.close()
+    return len(connections)
+
+
+# Drop connections inherited from the parent process after fork.
+# close=False leaves the parent's sockets alone instead of closing them from the child
+def dispose_engine_after_fork() -> None:
+    engine.dispose(close=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, TIMESTAMP, CheckConstraint, ForeignKey  # type: ignore
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Boolean, TIMESTAMP, CheckConstraint, ForeignKey  # type: ignore
 from sqlalchemy.orm import relationship  # type: ignore
 from sqlalchemy.sql import func  # type: ignore
 from db.database import Base
@@ -39,3 +39,10 @@ class Post(Base):
         "User",
         back_populates="posts",
     )
+
+
+class CacheGeneration(Base):
+    __tablename__ = "cache_generations"
+
+    namespace = Column(String(50), primary_key=True)
+    generation = Column(BigInteger, nullable=False, server_default="0")
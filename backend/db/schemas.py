@@ -34,6 +34,20 @@ class PostsResponse(BaseModel):
     posts: List[PostResponse]
 
 
+class LeaderboardEntry(BaseModel):
+    post_id: int
+    user_id: int
+    title: str
+    likes_count: int
+    created_at: Optional[datetime] = None
+    score: float
+
+
+class LeaderboardResponse(BaseModel):
+    kind: str
+    posts: List[LeaderboardEntry]
+
+
 # ================ USERS ================
 class UserCreate(BaseModel):
     login: str
@@ -81,6 +95,17 @@ class UserResponseLight(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class MeResponse(UserResponseLight):
+    """Профиль с ограниченным списком последних постов"""
+    posts: Optional[List[PostResponse]] = None
+    next_cursor: Optional[str] = None
+
+
+class PostsCursorResponse(BaseModel):
+    posts: List[PostResponse]
+    next_cursor: Optional[str] = None
+
+
 class UsersResponse(BaseModel):
     totalCount: int
     page: int = 1
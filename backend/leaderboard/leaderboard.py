@@ -0,0 +1,328 @@
+from bisect import bisect_left, insort
+from datetime import datetime, timezone
+from threading import Lock
+from types import SimpleNamespace
+import math
+import os
+import time
+
+from db.database import SessionLocal
+from db.models import Post
+
+
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", "100"))
+LEADERBOARD_REFRESH = int(os.getenv("LEADERBOARD_REFRESH", "60"))  # seconds
+TRENDING_HALF_LIFE = int(os.getenv("TRENDING_HALF_LIFE", str(6 * 3600)))  # seconds
+TRENDING_SIZE = int(os.getenv("TRENDING_SIZE", "1000"))
+# likes of a post credited to its updated_at when trending is seeded from the DB
+TRENDING_SEED_LIKES = int(os.getenv("TRENDING_SEED_LIKES", "10"))
+
+# trending scores below this are dropped (~7 half-lives after a single like)
+TRENDING_MIN_SCORE = 0.01
+# rebase the stored scores before exp() gets anywhere near overflow
+TRENDING_REBASE_AT = 50.0
+
+
+class Leaderboard:
+    """Top posts by likes and trending posts, kept in memory.
+
+    Top: the `size` best posts as a sorted list of (-likes, -post_id). Posts that
+    fall out of it only leave an upper bound (`ceiling`) of what they could have;
+    while the last served entry is still >= ceiling the answer is exact,
+    otherwise the list is reloaded from the DB on the next read. Updates that
+    arrive while a reload is querying the DB are logged and replayed on top of it.
+
+    Trending: sum of exp(-decay * age) over the likes of a post. Scores are stored
+    relative to `origin`, so decay doesn't have to touch every entry and
+    the ordering never changes by itself. Every reload merges them with a seed
+    from the DB, so likes handled by the other workers show up too.
+    """
+
+    def __init__(
+        self,
+        size: int = LEADERBOARD_SIZE,
+        refresh: int = LEADERBOARD_REFRESH,
+        half_life: int = TRENDING_HALF_LIFE,
+        trending_size: int = TRENDING_SIZE
+    ):
+        self.size = size
+        self.refresh = refresh
+        self.decay = math.log(2) / half_life
+        self.trending_size = trending_size
+        self.lock = Lock()
+        self.rebuild_lock = Lock()
+
+        self.top_keys: list[tuple[int, int]] = []
+        self.top_likes: dict[int, int] = {}
+        self.ceiling = -1  # max likes a post outside of the top list may have, -1: no such posts
+        self.built_at: float | None = None
+        self.pending: list[tuple[str, object]] | None = None  # top updates logged during a reload
+
+        self.origin = time.time()
+        self.trending_scores: dict[int, float] = {}
+        self.trending_order: list[int] | None = None
+
+        self.posts: dict[int, dict] = {}
+
+    # ======== helpers (called under lock) ========
+    def _remember(self, post: Post) -> None:
+        self.posts[post.post_id] = {
+            "post_id": post.post_id,
+            "user_id": post.user_id,
+            "title": post.title,
+            "likes_count": post.likes_count or 0,
+            "created_at": post.created_at,
+        }
+
+    def _forget_if_unused(self, post_id: int) -> None:
+        if post_id not in self.top_likes and post_id not in self.trending_scores:
+            self.posts.pop(post_id, None)
+
+    def _top_remove(self, post_id: int) -> None:
+        likes = self.top_likes.pop(post_id)
+        key = (-likes, -post_id)
+        del self.top_keys[bisect_left(self.top_keys, key)]
+
+    def _top_set(self, post: Post) -> None:
+        likes = post.likes_count or 0
+        if post.post_id in self.top_likes:
+            self._top_remove(post.post_id)
+        elif len(self.top_keys) >= self.size and (-likes, -post.post_id) > self.top_keys[-1]:
+            # doesn't make it into the list
+            self.ceiling = max(self.ceiling, likes)
+            return
+
+        self.top_likes[post.post_id] = likes
+        insort(self.top_keys, (-likes, -post.post_id))
+        self._remember(post)
+
+        if len(self.top_keys) > self.size:
+            dropped_likes, dropped_id = self.top_keys.pop()
+            del self.top_likes[-dropped_id]
+            self.ceiling = max(self.ceiling, -dropped_likes)
+            self._forget_if_unused(-dropped_id)
+
+    def _weight(self, at: float) -> float:
+        return math.exp(self.decay * (at - self.origin))
+
+    def _rebase(self, now: float) -> None:
+        factor = math.exp(-self.decay * (now - self.origin))
+        self.origin = now
+        for post_id, score in list(self.trending_scores.items()):
+            score *= factor
+            if score < TRENDING_MIN_SCORE:
+                del self.trending_scores[post_id]
+                self._forget_if_unused(post_id)
+            else:
+                self.trending_scores[post_id] = score
+        self.trending_order = None
+
+    def _trending_set(self, post: Post, score: float) -> None:
+        if score <= 0:
+            self.trending_scores.pop(post.post_id, None)
+            self._forget_if_unused(post.post_id)
+        else:
+            self.trending_scores[post.post_id] = score
+            self._remember(post)
+        if len(self.trending_scores) > self.trending_size:
+            lowest = min(self.trending_scores, key=self.trending_scores.__getitem__)
+            del self.trending_scores[lowest]
+            self._forget_if_unused(lowest)
+        self.trending_order = None
+
+    def _drop(self, post_id: int) -> None:
+        if post_id in self.top_likes:
+            self._top_remove(post_id)
+        if self.trending_scores.pop(post_id, None) is not None:
+            self.trending_order = None
+        self.posts.pop(post_id, None)
+
+    def _drop_user(self, user_id: int) -> None:
+        for post_id in [post_id for post_id, post in self.posts.items() if post["user_id"] == user_id]:
+            self._drop(post_id)
+
+    def _log(self, event: str, value) -> None:
+        if self.pending is None:
+            return
+        if event in ("set", "unliked"):
+            # the ORM object may be changed (or expired) before the replay
+            value = SimpleNamespace(**{
+                name: getattr(value, name) for name in ("post_id", "user_id", "title", "likes_count", "created_at")
+            })
+        self.pending.append((event, value))
+
+    # trending isn't replayed: rebuild keeps the local scores, updates included
+    def _replay(self, events: list[tuple[str, object]]) -> None:
+        for event, value in events:
+            if event == "set":
+                # the loaded row may already include this like and later ones
+                if (value.likes_count or 0) > self.top_likes.get(value.post_id, -1):
+                    self._top_set(value)
+            elif event == "unliked" and value.post_id in self.top_likes:
+                self._top_set(value)
+            elif event == "deleted":
+                self._drop(value)
+            elif event == "user_deleted":
+                self._drop_user(value)
+
+    def _top_is_exact(self, limit: int) -> bool:
+        if self.ceiling < 0:
+            return True
+        if len(self.top_keys) < limit:
+            return False
+        return -self.top_keys[limit - 1][0] >= self.ceiling
+
+    # ======== updates from the handlers ========
+    def post_created(self, post: Post) -> None:
+        with self.lock:
+            self._top_set(post)
+            self._log("set", post)
+
+    def post_updated(self, post: Post) -> None:
+        with self.lock:
+            if post.post_id in self.posts:
+                self._remember(post)
+
+    def post_liked(self, post: Post) -> None:
+        now = time.time()
+        with self.lock:
+            if self.decay * (now - self.origin) > TRENDING_REBASE_AT:
+                self._rebase(now)
+            self._top_set(post)
+            self._log("set", post)
+            self._trending_set(post, self.trending_scores.get(post.post_id, 0.0) + self._weight(now))
+
+    def post_unliked(self, post: Post) -> None:
+        with self.lock:
+            if post.post_id in self.top_likes:
+                self._top_set(post)
+            self._log("unliked", post)
+            if post.post_id in self.trending_scores:
+                # which like is removed is unknown: take away an average one,
+                # not a brand-new one that may outweigh all the older likes
+                likes = post.likes_count or 0
+                self._trending_set(post, self.trending_scores[post.post_id] * likes / (likes + 1))
+
+    def post_deleted(self, post_id: int) -> None:
+        with self.lock:
+            self._drop(post_id)
+            self._log("deleted", post_id)
+
+    def user_deleted(self, user_id: int) -> None:
+        with self.lock:
+            self._drop_user(user_id)
+            self._log("user_deleted", user_id)
+
+    # ======== loading ========
+    def _load_top(self, db) -> list[Post]:
+        return (
+            db.query(Post)
+            .order_by(Post.likes_count.desc(), Post.post_id.desc())
+            .limit(self.size + 1)
+            .all()
+        )
+
+    def _load_recent(self, db) -> list[Post]:
+        # likes are not stored with a timestamp, so trending is seeded from the
+        # posts liked recently: every like bumps updated_at (see the trigger)
+        window = math.log(1 / TRENDING_MIN_SCORE) / self.decay
+        since = datetime.fromtimestamp(time.time() - window, timezone.utc).replace(tzinfo=None)
+        return (
+            db.query(Post)
+            .filter(Post.likes_count > 0, Post.updated_at >= since)
+            .order_by(Post.updated_at.desc())
+            .limit(self.trending_size)
+            .all()
+        )
+
+    # Reload the top list from the DB and merge the trending scores with a seed
+    # from the recently liked posts. The seed credits at most TRENDING_SEED_LIKES
+    # likes to updated_at: the trigger also bumps it on edits, so an old popular
+    # post that was just edited would otherwise jump to the top of trending
+    def rebuild(self, db=None) -> None:
+        with self.lock:
+            self.pending = []
+        close = db is None
+        db = db or SessionLocal()
+        try:
+            top = self._load_top(db)
+            recent = self._load_recent(db)
+        except BaseException:
+            with self.lock:
+                self.pending = None
+            raise
+        finally:
+            if close:
+                db.close()
+
+        now = time.time()
+        with self.lock:
+            self.top_keys = []
+            self.top_likes = {}
+            self.ceiling = -1
+            if len(top) > self.size:
+                self.ceiling = top.pop().likes_count or 0
+            for post in top:
+                self.top_likes[post.post_id] = post.likes_count or 0
+                self.top_keys.append((-(post.likes_count or 0), -post.post_id))
+                self._remember(post)
+            self.top_keys.sort()
+
+            # posts that are not recent anymore (or were deleted by another worker) are dropped
+            self._rebase(now)
+            local_scores = self.trending_scores
+            self.trending_scores = {}
+            for post in recent:
+                liked_at = min(post.updated_at.replace(tzinfo=timezone.utc).timestamp(), now)
+                seed = min(post.likes_count, TRENDING_SEED_LIKES) * self._weight(liked_at)
+                self.trending_scores[post.post_id] = max(seed, local_scores.get(post.post_id, 0.0))
+                self._remember(post)
+            self.trending_order = None
+
+            # likes, creates and deletes handled while the DB was being queried
+            self._replay(self.pending or [])
+            self.pending = None
+
+            for post_id in list(self.posts):
+                self._forget_if_unused(post_id)
+            self.built_at = time.monotonic()
+
+    def _is_stale(self, limit: int | None) -> bool:
+        with self.lock:
+            if self.built_at is None or time.monotonic() - self.built_at > self.refresh:
+                return True
+            return limit is not None and not self._top_is_exact(limit)
+
+    def _ensure_fresh(self, limit: int | None = None) -> None:
+        if not self._is_stale(limit):
+            return
+        # one thread reloads, the others wait for it instead of querying too
+        with self.rebuild_lock:
+            if self._is_stale(limit):
+                self.rebuild()
+
+    # ======== reads ========
+    def top(self, limit: int) -> list[dict]:
+        limit = min(limit, self.size)
+        self._ensure_fresh(limit)
+        with self.lock:
+            result = []
+            for likes, post_id in self.top_keys[:limit]:
+                result.append({**self.posts[-post_id], "likes_count": -likes, "score": float(-likes)})
+            return result
+
+    def trending(self, limit: int) -> list[dict]:
+        self._ensure_fresh()
+        now = time.time()
+        with self.lock:
+            if self.trending_order is None:
+                self.trending_order = sorted(self.trending_scores, key=self.trending_scores.__getitem__, reverse=True)
+            factor = math.exp(-self.decay * (now - self.origin))
+            result = []
+            for post_id in self.trending_order[:limit]:
+                score = self.trending_scores[post_id] * factor
+                result.append({**self.posts[post_id], "score": round(score, 4)})
+            return result
+
+
+leaderboard = Leaderboard()
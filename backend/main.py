@@ -1,26 +1,97 @@
 from fastapi import FastAPI  # type: ignore
 from fastapi.middleware.cors import CORSMiddleware  # type: ignore
+from contextlib import asynccontextmanager
+from sqlalchemy.orm import configure_mappers  # type: ignore
+import logging
+import httpx  # type: ignore
 import os
 
+from cache.cache import query_cache
+from cache.singleflight import single_flight
+from db.database import engine, warm_up_pool
+from leaderboard.leaderboard import leaderboard
 from routers import auth, posts, users
+from routers import leaderboard as leaderboard_router
 
-app = FastAPI()
 
+logger = logging.getLogger(__name__)
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://localhost"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"]
-)
+APP_WARMUP = os.getenv("APP_WARMUP", "1") == "1"
+WARMUP_PATHS = [
+    "/health",
+    "/api/posts",
+    "/api/posts?sort_by=likes_count&sort_order=desc",
+    "/api/leaderboard/top",
+    "/api/leaderboard/trending",
+]
 
 
-app.include_router(auth.router)
-app.include_router(posts.router)
-app.include_router(users.router)
+# Send a few requests through the ASGI app in-process: this compiles the SQL
+# statements, builds the pydantic validators and fills the ORM caches before real traffic
+async def run_warmup_requests(app: FastAPI) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://warmup") as client:
+        for path in WARMUP_PATHS:
+            try:
+                response = await client.get(path)
+                logger.info("warm-up %s -> %s", path, response.status_code)
+            except Exception:
+                logger.warning("warm-up %s failed", path, exc_info=True)
 
 
-@app.get("/health", tags=["System"])
-def health_check():
-    return {"status": "ok"}
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # ======== startup ========
+    query_cache.generations.setup(engine)
+    try:
+        leaderboard.rebuild()
+    except Exception:
+        logger.warning("leaderboard rebuild failed, it will be loaded on first read", exc_info=True)
+    if APP_WARMUP:
+        try:
+            opened = warm_up_pool()
+            logger.info("connection pool warmed up: %s connections", opened)
+        except Exception:
+            logger.warning("connection pool warm-up failed", exc_info=True)
+        await run_warmup_requests(app)
+
+    yield
+
+    # ======== shutdown ========
+    engine.dispose()
+
+
+def create_app() -> FastAPI:
+    # done here rather than in the lifespan: server.py imports the app before forking,
+    # so the workers inherit the configured mappers
+    configure_mappers()
+    app = FastAPI(lifespan=lifespan)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:3000", "http://localhost"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"]
+    )
+
+    app.include_router(auth.router)
+    app.include_router(posts.router)
+    app.include_router(users.router)
+    app.include_router(leaderboard_router.router)
+
+    @app.get("/health", tags=["System"])
+    def health_check():
+        return {"status": "ok"}
+
+    @app.get("/cache/stats", tags=["System"])
+    def cache_stats():
+        return {
+            "query_cache": query_cache.stats(),
+            "single_flight": single_flight.stats(),
+        }
+
+    return app
+
+
+app = create_app()
@@ -1,15 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status  # type: ignore
+from fastapi import APIRouter, Depends, HTTPException, status, Query  # type: ignore
 from fastapi.security import OAuth2PasswordRequestForm  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
-from typing import Annotated
+from sqlalchemy import tuple_  # type: ignore
+from typing import Annotated, Optional
+from datetime import datetime
+import base64
+import binascii
 import os
 
 from auth.auth import create_access_token, get_current_user
 from auth.utils import get_password_hash, verify_password
+from cache.cache import query_cache, USERS
 from db.database import get_db
-from db.models import User
+from db.models import User, Post
 from db.schemas import Token
-from db.schemas import UserCreate, UserResponse
+from db.schemas import UserCreate, UserResponseLight, MeResponse, PostsCursorResponse
 from db.schemas import PostResponse
 
 
@@ -39,6 +44,7 @@ async def register(
     )
 
     db.add(new_user)
+    query_cache.invalidate(db, USERS)
     db.commit()
     db.refresh(new_user)
 
@@ -69,8 +75,62 @@ async def login(
     return {"access_token": access_token, "token_type": "bearer"}
 
 
-@router.get("/api/me", response_model=UserResponse)
-async def get_me(
-    current_user: Annotated[User, Depends(get_current_user)]
-) -> UserResponse:
-    return current_user
+# Cursor for (created_at DESC, post_id DESC) pagination: "<created_at iso>|<post_id>" in urlsafe base64
+def encode_cursor(post: Post) -> str:
+    raw = f"{post.created_at.isoformat()}|{post.post_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, post_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(post_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+# Newest posts of the user after the cursor, one query on (user_id, created_at, post_id)
+def get_posts_page(
+    db: Session,
+    user_id: int,
+    limit: int,
+    cursor: str | None = None
+) -> tuple[list[Post], str | None]:
+    query = db.query(Post).filter(Post.user_id == user_id)
+    if cursor:
+        created_at, post_id = decode_cursor(cursor)
+        # row comparison: Postgres seeks on the index instead of filtering an OR
+        query = query.filter(tuple_(Post.created_at, Post.post_id) < tuple_(created_at, post_id))
+    posts = query.order_by(Post.created_at.desc(), Post.post_id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        next_cursor = encode_cursor(posts[-1])
+    return posts, next_cursor
+
+
+@router.get("/api/me", response_model=MeResponse)
+def get_me(
+    current_user: Annotated[User, Depends(get_current_user)],
+    include_posts: bool = Query(True),
+    posts_limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+) -> MeResponse:
+    # built from the light schema: validating MeResponse from the ORM object would load user.posts
+    me = MeResponse(**UserResponseLight.model_validate(current_user).model_dump())
+    if include_posts:
+        posts, me.next_cursor = get_posts_page(db, current_user.user_id, posts_limit)
+        me.posts = [PostResponse.model_validate(post) for post in posts]
+    return me
+
+
+@router.get("/api/me/posts", response_model=PostsCursorResponse)
+def get_my_posts(
+    current_user: Annotated[User, Depends(get_current_user)],
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+) -> PostsCursorResponse:
+    posts, next_cursor = get_posts_page(db, current_user.user_id, limit, cursor)
+    return PostsCursorResponse(posts=posts, next_cursor=next_cursor)
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Query  # type: ignore
+
+from db.schemas import LeaderboardResponse
+from leaderboard.leaderboard import leaderboard
+
+
+router = APIRouter(tags=["Leaderboard"])
+
+
+@router.get("/api/leaderboard/top", response_model=LeaderboardResponse)
+def get_top_posts(
+    limit: int = Query(10, ge=1, le=100)
+):
+    return LeaderboardResponse(kind="top", posts=leaderboard.top(limit))
+
+
+@router.get("/api/leaderboard/trending", response_model=LeaderboardResponse)
+def get_trending_posts(
+    limit: int = Query(10, ge=1, le=100)
+):
+    return LeaderboardResponse(kind="trending", posts=leaderboard.trending(limit))
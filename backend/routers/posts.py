@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query  # type: ignore
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
 from typing import Optional, Literal, Annotated
 from datetime import datetime
 from sqlalchemy import or_, and_  # type: ignore
 
 from auth.auth import get_current_user
+from cache.cache import query_cache, POSTS
+from cache.singleflight import single_flight, flight_key
 from db.database import get_db
 from db.models import User, Post
 from db.schemas import PostsResponse, PostResponse, PostCreate, PostUpdate
+from leaderboard.leaderboard import leaderboard
 
 
 router = APIRouter(tags=["Posts"])
@@ -33,70 +36,96 @@ def get_all_posts(
     sort_order: str = Query("asc", pattern="^(asc|desc)$"),
     db: Session = Depends(get_db)
 ):
-    query = db.query(Post)
+    cache_key = query_cache.make_key(db, POSTS, {
+        "view": "all",
+        "page": page,
+        "pageSize": pageSize,
+        "user_id": user_id or None,
+        "title": title or None,
+        "content": content or None,
+        "likes_min": likes_min,
+        "likes_max": likes_max,
+        "created_before": created_before,
+        "created_after": created_after,
+        "search": search or None,
+        "search_field": search_field if search else None,
+        "sort_by": sort_by,
+        "sort_order": sort_order,
+    })
+    cached = query_cache.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    def load_page() -> bytes:
+        query = db.query(Post)
     
-    # ======== filters ========
-    filters = []
-    if user_id:
-        filters.append(Post.user_id == user_id)
+        # ======== filters ========
+        filters = []
+        if user_id:
+            filters.append(Post.user_id == user_id)
     
-    if title:
-        filters.append(Post.title.ilike(f"%{title}%"))
+        if title:
+            filters.append(Post.title.ilike(f"%{title}%"))
     
-    if content:
-        filters.append(Post.content.ilike(f"%{content}%"))
+        if content:
+            filters.append(Post.content.ilike(f"%{content}%"))
     
-    if likes_min is not None:
-        filters.append(Post.likes_count >= likes_min)
+        if likes_min is not None:
+            filters.append(Post.likes_count >= likes_min)
     
-    if likes_max is not None:
-        filters.append(Post.likes_count <= likes_max)
+        if likes_max is not None:
+            filters.append(Post.likes_count <= likes_max)
 
-    if created_after:
-        filters.append(Post.created_at >= created_after)
+        if created_after:
+            filters.append(Post.created_at >= created_after)
 
-    if created_before:
-        filters.append(Post.created_at <= created_before)
+        if created_before:
+            filters.append(Post.created_at <= created_before)
         
-    if search:
-        search_term = f"%{search}%"
+        if search:
+            search_term = f"%{search}%"
         
-        if search_field == "all":
-            search_filter = or_(
-                Post.title.ilike(search_term),
-                Post.content.ilike(search_term)
-            )
-            filters.append(search_filter)
+            if search_field == "all":
+                search_filter = or_(
+                    Post.title.ilike(search_term),
+                    Post.content.ilike(search_term)
+                )
+                filters.append(search_filter)
             
-        elif search_field == "title":
-            filters.append(Post.title.ilike(search_term))
+            elif search_field == "title":
+                filters.append(Post.title.ilike(search_term))
             
-        elif search_field == "content":
-            filters.append(Post.content.ilike(search_term))
+            elif search_field == "content":
+                filters.append(Post.content.ilike(search_term))
     
-    if filters:
-        query = query.filter(and_(*filters))
+        if filters:
+            query = query.filter(and_(*filters))
     
-    # ======== sort  ========
-    sort_column = getattr(Post, sort_by, Post.created_at)
-    if sort_order == "desc":
-        query = query.order_by(sort_column.desc())
-    else:
-        query = query.order_by(sort_column.asc())
+        # ======== sort  ========
+        sort_column = getattr(Post, sort_by, Post.created_at)
+        if sort_order == "desc":
+            query = query.order_by(sort_column.desc())
+        else:
+            query = query.order_by(sort_column.asc())
     
-    # ====== pagination ======
-    total_count = query.count()
-    offset = (page - 1) * pageSize
-    posts = query.offset(offset).limit(pageSize).all()
-    total_pages = (total_count + pageSize - 1) // pageSize
-
-    return PostsResponse(
-        totalCount=total_count,
-        page=page,
-        pageSize=pageSize,
-        totalPages=total_pages,
-        posts=posts
-    )
+        # ====== pagination ======
+        total_count = query.count()
+        offset = (page - 1) * pageSize
+        posts = query.offset(offset).limit(pageSize).all()
+        total_pages = (total_count + pageSize - 1) // pageSize
+
+        body = PostsResponse(
+            totalCount=total_count,
+            page=page,
+            pageSize=pageSize,
+            totalPages=total_pages,
+            posts=posts
+        ).model_dump_json().encode()
+        query_cache.set(cache_key, body)
+        return body
+
+    body = single_flight.do(flight_key(cache_key), load_page)
+    return Response(content=body, media_type="application/json")
 
 
 @router.post("/api/posts", response_model=PostResponse, status_code=status.HTTP_201_CREATED)
@@ -113,8 +142,10 @@ def create_post(
     )
 
     db.add(new_post)
+    query_cache.invalidate(db, POSTS)
     db.commit()
     db.refresh(new_post)
+    leaderboard.post_created(new_post)
     return new_post
 
 
@@ -123,10 +154,15 @@ def get_post(
     post_id: int, 
     db: Session = Depends(get_db)
 ):
-    post_obj = db.query(Post).filter(Post.post_id == post_id).first()
-    if not post_obj:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
-    return post_obj
+    def load_post() -> bytes:
+        post_obj = db.query(Post).filter(Post.post_id == post_id).first()
+        if not post_obj:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+        return PostResponse.model_validate(post_obj).model_dump_json().encode()
+
+    # not cached, only coalesced: the key needs no generations (and no extra query)
+    body = single_flight.do(flight_key(f"post:{post_id}"), load_post)
+    return Response(content=body, media_type="application/json")
 
 
 @router.patch("/api/posts/{post_id}", response_model=PostResponse)
@@ -147,8 +183,10 @@ def update_post(
     for field, value in update_data.items():
         setattr(post_obj, field, value)
 
+    query_cache.invalidate(db, POSTS)
     db.commit()
     db.refresh(post_obj)
+    leaderboard.post_updated(post_obj)
     return post_obj
 
 
@@ -168,7 +206,9 @@ def delete_post(
     post_title = post_obj.title
 
     db.delete(post_obj)
+    query_cache.invalidate(db, POSTS)
     db.commit()
+    leaderboard.post_deleted(post_id)
     return {"message": f"Post '{post_title}' deleted successfully", "id": post_id}
 
 
@@ -188,8 +228,10 @@ def like_post(
     post_obj.likes_count += 1
     likes = post_obj.likes_count
 
+    query_cache.invalidate(db, POSTS)
     db.commit()
     db.refresh(post_obj)
+    leaderboard.post_liked(post_obj)
     
     return {
         "message": "Post liked successfully",
@@ -219,8 +261,10 @@ def unlike_post(
     post_obj.likes_count -= 1
     likes = post_obj.likes_count
 
+    query_cache.invalidate(db, POSTS)
     db.commit()
     db.refresh(post_obj)
+    leaderboard.post_unliked(post_obj)
     
     return {
         "message": "Post unliked successfully",
@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query  # type: ignore
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
 from typing import Optional, Literal, Annotated
 from datetime import datetime
+import json
 from sqlalchemy import or_, and_  # type: ignore
 
 from auth.auth import get_current_user
+from cache.cache import query_cache, POSTS, USERS
+from cache.singleflight import single_flight, flight_key
 from db.database import get_db
 from auth.utils import get_password_hash
 from db.models import User, Post
 from db.schemas import PostsResponse
 from db.schemas import UserResponse, UsersResponse, UserUpdate, UserResponseLight
+from leaderboard.leaderboard import leaderboard
 
 
 router = APIRouter(tags=["Users"])
@@ -22,29 +26,44 @@ def get_user_posts(
     pageSize: int = Query(10, ge=1, le=100),
     db: Session = Depends(get_db)
 ):
+    cache_key = query_cache.make_key(db, POSTS, {
+        "view": "user",
+        "user_id": user_id,
+        "page": page,
+        "pageSize": pageSize,
+    })
+    cached = query_cache.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    def load_page() -> bytes:
+        user = db.query(User).filter(User.user_id == user_id).first()
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
 
-    user = db.query(User).filter(User.user_id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    query = db.query(Post).filter(Post.user_id == user_id)
-    query = query.order_by(Post.created_at.desc())
-    
-    total_count = query.count()
-    offset = (page - 1) * pageSize
-    posts = query.offset(offset).limit(pageSize).all()
-    total_pages = (total_count + pageSize - 1) // pageSize
-
-    return PostsResponse(
-        totalCount=total_count,
-        page=page,
-        pageSize=pageSize,
-        totalPages=total_pages,
-        posts=posts
-    )
+        query = db.query(Post).filter(Post.user_id == user_id)
+        query = query.order_by(Post.created_at.desc())
+
+        total_count = query.count()
+        offset = (page - 1) * pageSize
+        posts = query.offset(offset).limit(pageSize).all()
+        total_pages = (total_count + pageSize - 1) // pageSize
+
+        body = PostsResponse(
+            totalCount=total_count,
+            page=page,
+            pageSize=pageSize,
+            totalPages=total_pages,
+            posts=posts
+        ).model_dump_json().encode()
+        query_cache.set(cache_key, body)
+        return body
+
+    body = single_flight.do(flight_key(cache_key), load_page)
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/api/users", response_model=UsersResponse)
@@ -55,36 +74,45 @@ def get_all_users(
     search: Optional[str] = Query(None),
     db: Session = Depends(get_db)
 ):
-    query = db.query(User)
-    
-    if role:
-        query = query.filter(User.role == role)
-    
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                User.login.ilike(search_term),
-                User.email.ilike(search_term),
-                User.first_name.ilike(search_term),
-                User.last_name.ilike(search_term)
+    def load_page() -> bytes:
+        query = db.query(User)
+
+        if role:
+            query = query.filter(User.role == role)
+
+        if search:
+            search_term = f"%{search}%"
+            query = query.filter(
+                or_(
+                    User.login.ilike(search_term),
+                    User.email.ilike(search_term),
+                    User.first_name.ilike(search_term),
+                    User.last_name.ilike(search_term)
+                )
             )
-        )
-    
-    query = query.order_by(User.user_id.asc())
-    
-    total_count = query.count()
-    offset = (page - 1) * pageSize
-    users = query.offset(offset).limit(pageSize).all()
-    total_pages = (total_count + pageSize - 1) // pageSize
-
-    return UsersResponse(
-        totalCount=total_count,
-        page=page,
-        pageSize=pageSize,
-        totalPages=total_pages,
-        users=users
+
+        query = query.order_by(User.user_id.asc())
+
+        total_count = query.count()
+        offset = (page - 1) * pageSize
+        users = query.offset(offset).limit(pageSize).all()
+        total_pages = (total_count + pageSize - 1) // pageSize
+
+        return UsersResponse(
+            totalCount=total_count,
+            page=page,
+            pageSize=pageSize,
+            totalPages=total_pages,
+            users=users
+        ).model_dump_json().encode()
+
+    # not cached, only coalesced: the key needs no generations (and no extra query)
+    key = "users:" + json.dumps(
+        {"page": page, "pageSize": pageSize, "role": role or None, "search": search or None},
+        sort_keys=True,
     )
+    body = single_flight.do(flight_key(key), load_page)
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/api/users/{user_id}", response_model=UserResponseLight)
@@ -92,13 +120,17 @@ def get_user(
     user_id: int,
     db: Session = Depends(get_db)
 ):
-    user = db.query(User).filter(User.user_id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    return user
+    def load_user() -> bytes:
+        user = db.query(User).filter(User.user_id == user_id).first()
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        return UserResponseLight.model_validate(user).model_dump_json().encode()
+
+    body = single_flight.do(flight_key(f"user:{user_id}"), load_user)
+    return Response(content=body, media_type="application/json")
 
 
 @router.patch("/api/users/{user_id}", response_model=UserResponse)
@@ -145,6 +177,7 @@ def update_user(
     for field, value in update_data.items():
         setattr(user, field, value)
     
+    query_cache.invalidate(db, USERS)
     db.commit()
     db.refresh(user)
     return user
@@ -172,7 +205,9 @@ def delete_user(
     user_login = user.login
     
     db.delete(user)
+    query_cache.invalidate(db, USERS, POSTS)
     db.commit()
+    leaderboard.user_deleted(user_id)
     
     return {
         "message": f"User '{user_login}' deleted successfully",
@@ -0,0 +1,209 @@
+"""Production launcher.
+
+The app is imported once in the master process (preload) and the workers are
+forked from it, so every worker starts with the routers, schemas and mappers
+already built. Each worker drops the inherited DB connections, runs the app
+lifespan (pool + warm-up) and serves on the shared socket until it hits its
+max-requests limit, after which the master replaces it.
+"""
+import logging
+import math
+import os
+import random
+import signal
+import sys
+import time
+
+import uvicorn  # type: ignore
+
+
+logger = logging.getLogger("server")
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+MAX_REQUESTS = int(os.getenv("MAX_REQUESTS", "10000"))
+MAX_REQUESTS_JITTER = int(os.getenv("MAX_REQUESTS_JITTER", "1000"))
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "30"))  # seconds
+KEEPALIVE_TIMEOUT = int(os.getenv("KEEPALIVE_TIMEOUT", "5"))  # seconds
+# every worker holds up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections, keep the default
+# well below Postgres max_connections (100) on big hosts
+WEB_CONCURRENCY_MAX = int(os.getenv("WEB_CONCURRENCY_MAX", "4"))
+# a worker that fails before living this long counts as a startup crash
+WORKER_MIN_UPTIME = 10  # seconds
+# respawn delay doubles with every crash in a row, up to the max
+RESPAWN_DELAY = 0.5  # seconds
+RESPAWN_DELAY_MAX = 30  # seconds
+# the master gives up after this many startup crashes in a row
+MAX_CRASHES = int(os.getenv("MAX_CRASHES", "5"))
+
+
+# CPUs granted by the cgroup v2 quota (docker --cpus), None when unlimited
+def get_cgroup_cpus() -> int | None:
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+    except (OSError, ValueError):
+        return None
+    if quota == "max":
+        return None
+    return max(1, math.ceil(int(quota) / int(period)))
+
+
+def get_workers_count() -> int:
+    workers = os.getenv("WEB_CONCURRENCY")
+    if workers:
+        return max(1, int(workers))
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = get_cgroup_cpus()
+    if quota is not None:
+        cpus = min(cpus, quota)
+    return max(1, min(cpus, WEB_CONCURRENCY_MAX))
+
+
+def make_config(app, limit_max_requests: int | None = None) -> uvicorn.Config:
+    return uvicorn.Config(
+        app,
+        host=HOST,
+        port=PORT,
+        proxy_headers=True,
+        forwarded_allow_ips="*",
+        timeout_keep_alive=KEEPALIVE_TIMEOUT,
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+        limit_max_requests=limit_max_requests,
+    )
+
+
+def run_worker(app, sock) -> None:
+    from db.database import dispose_engine_after_fork
+
+    dispose_engine_after_fork()
+    # jitter spreads the restarts so the workers don't recycle all at once
+    limit = MAX_REQUESTS + random.randint(0, MAX_REQUESTS_JITTER) if MAX_REQUESTS > 0 else None
+    server = uvicorn.Server(make_config(app, limit_max_requests=limit))
+    server.run(sockets=[sock])
+
+
+class Master:
+    def __init__(self, app, workers: int):
+        self.app = app
+        self.workers = workers
+        self.children: dict[int, float] = {}
+        self.should_exit = False
+        self.exit_code = 0
+        self.crashes = 0
+        self.pending = 0
+        self.next_spawn_at = 0.0
+        self.sock = make_config(app).bind_socket()
+
+    def spawn_worker(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                run_worker(self.app, self.sock)
+            except BaseException:
+                logger.exception("worker %s crashed", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = time.monotonic()
+        logger.info("started worker %s", pid)
+
+    def handle_exit(self, signum, frame) -> None:
+        self.should_exit = True
+
+    # (pid, seconds it lived, exit code) of the workers that exited
+    def reap_workers(self) -> list[tuple[int, float, int]]:
+        exited = []
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            started_at = self.children.pop(pid, None)
+            if started_at is not None:
+                exited.append((pid, time.monotonic() - started_at, os.waitstatus_to_exitcode(status)))
+        return exited
+
+    def schedule_respawn(self, pid: int, uptime: float, code: int) -> None:
+        if code != 0 and uptime < WORKER_MIN_UPTIME:
+            self.crashes += 1
+            logger.error("worker %s crashed after %.1fs (exit code %s)", pid, uptime, code)
+        else:
+            self.crashes = 0
+            logger.info("worker %s exited (exit code %s), replacing", pid, code)
+
+        if self.crashes >= MAX_CRASHES:
+            logger.error("%s workers crashed on startup in a row, stopping", self.crashes)
+            self.should_exit = True
+            self.exit_code = 1
+            return
+
+        delay = min(RESPAWN_DELAY * 2 ** self.crashes, RESPAWN_DELAY_MAX) if self.crashes else 0
+        self.next_spawn_at = max(self.next_spawn_at, time.monotonic() + delay)
+        self.pending += 1
+
+    def drain(self) -> None:
+        logger.info("draining %s workers", len(self.children))
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.children.pop(pid, None)
+
+        deadline = time.monotonic() + GRACEFUL_TIMEOUT + 5
+        while self.children and time.monotonic() < deadline:
+            self.reap_workers()
+            time.sleep(0.1)
+
+        for pid in list(self.children):
+            logger.warning("worker %s did not stop in time, killing", pid)
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        self.reap_workers()
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self.handle_exit)
+        signal.signal(signal.SIGINT, self.handle_exit)
+
+        for _ in range(self.workers):
+            self.spawn_worker()
+
+        while not self.should_exit:
+            for pid, uptime, code in self.reap_workers():
+                if not self.should_exit:
+                    self.schedule_respawn(pid, uptime, code)
+            if self.pending and not self.should_exit and time.monotonic() >= self.next_spawn_at:
+                self.pending -= 1
+                self.spawn_worker()
+                continue
+            time.sleep(0.5)
+
+        self.drain()
+        self.sock.close()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(process)d] %(levelname)s %(name)s: %(message)s")
+
+    # preload: import the app (and create the engine) before forking
+    from main import app
+
+    workers = get_workers_count()
+    logger.info("listening on %s:%s with %s workers", HOST, PORT, workers)
+    master = Master(app, workers)
+    master.run()
+    sys.exit(master.exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -21,3 +21,11 @@ CREATE TABLE IF NOT EXISTS posts (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
 );
+
+-- query cache generations, shared by all backend workers
+CREATE TABLE IF NOT EXISTS cache_generations (
+    namespace VARCHAR(50) PRIMARY KEY,
+    generation BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO cache_generations (namespace) VALUES ('posts'), ('users') ON CONFLICT DO NOTHING;
@@ -4,4 +4,6 @@ CREATE INDEX idx_users_login ON users(login);
 
 -- posts
 CREATE INDEX idx_posts_user_id ON posts(user_id);
-CREATE INDEX idx_posts_created_at ON posts(created_at DESC);
\ No newline at end of file
+CREATE INDEX idx_posts_created_at ON posts(created_at DESC);
+CREATE INDEX idx_posts_likes_count ON posts(likes_count DESC, post_id DESC);
+CREATE INDEX idx_posts_user_id_created_at ON posts(user_id, created_at DESC, post_id DESC);
\ No newline at end of file
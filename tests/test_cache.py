@@ -0,0 +1,78 @@
+from backend.cache.cache import InMemoryCache, QueryCache, LocalGenerations, DatabaseGenerations, CacheGeneration  # type: ignore
+from sqlalchemy import create_engine  # type: ignore
+from sqlalchemy.orm import sessionmaker  # type: ignore
+import time
+
+
+def test_query_cache_key_normalization():
+    cache = QueryCache(InMemoryCache(), LocalGenerations())
+    key_1 = cache.make_key(None, "posts", {"page": 1, "sort_by": "likes_count", "title": None})
+    key_2 = cache.make_key(None, "posts", {"sort_by": "likes_count", "page": 1})
+    assert key_1 == key_2
+
+
+def test_query_cache_invalidation():
+    cache = QueryCache(InMemoryCache(), LocalGenerations())
+    key = cache.make_key(None, "posts", {"page": 1})
+    cache.set(key, b"page")
+    assert cache.get(key) == b"page"
+
+    cache.invalidate(None, "posts")
+    new_key = cache.make_key(None, "posts", {"page": 1})
+    assert new_key != key
+    assert cache.get(new_key) is None
+
+
+def test_database_generations_are_shared_between_sessions():
+    engine = create_engine("sqlite://")
+    CacheGeneration.__table__.create(engine)
+    Session = sessionmaker(bind=engine)
+    # two caches = two workers with their own entries, sharing the DB
+    worker_1 = QueryCache(InMemoryCache(), DatabaseGenerations())
+    worker_2 = QueryCache(InMemoryCache(), DatabaseGenerations())
+
+    with Session() as db:
+        key = worker_2.make_key(db, "posts", {"page": 1}, depends_on=("users",))
+        worker_2.set(key, b"old page")
+
+    with Session() as db:
+        worker_1.invalidate(db, "posts")
+        db.commit()
+
+    with Session() as db:
+        new_key = worker_2.make_key(db, "posts", {"page": 1}, depends_on=("users",))
+    assert new_key != key
+    assert worker_2.get(new_key) is None
+
+
+def test_in_memory_cache_limits():
+    backend = InMemoryCache(max_entries=2, max_bytes=1024)
+    backend.set("a", b"1", ttl=60)
+    backend.set("b", b"2", ttl=60)
+    backend.get("a")
+    backend.set("c", b"3", ttl=60)
+    assert backend.get("b") is None
+    assert backend.get("a") == b"1"
+
+    backend.set("big", b"x" * 2048, ttl=60)
+    assert backend.get("big") is None
+
+    backend.set("short", b"s", ttl=0)
+    time.sleep(0.01)
+    assert backend.get("short") is None
+
+    stats = backend.stats()
+    assert stats["evictions"] == 2
+    assert stats["hits"] == 2
+
+
+def test_database_generations_setup_on_existing_database():
+    engine = create_engine("sqlite://")
+    generations = DatabaseGenerations()
+    # twice: every worker runs it on startup
+    generations.setup(engine)
+    generations.setup(engine)
+
+    with sessionmaker(bind=engine)() as db:
+        rows = db.query(CacheGeneration.namespace, CacheGeneration.generation).all()
+    assert sorted(rows) == [("posts", 0), ("users", 0)]
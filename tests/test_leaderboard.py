@@ -0,0 +1,120 @@
+from backend.leaderboard.leaderboard import Leaderboard  # type: ignore
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import pytest  # type: ignore
+
+
+def make_post(post_id, likes=0, user_id=1):
+    return SimpleNamespace(post_id=post_id, user_id=user_id, title=f"post {post_id}", likes_count=likes, created_at=None)
+
+
+def make_board(size=3):
+    board = Leaderboard(size=size, refresh=3600)
+    board.rebuild = lambda db=None: None
+    board.built_at = 0.0
+    board.refresh = float("inf")
+    return board
+
+
+def test_top_is_updated_by_likes():
+    board = make_board()
+    posts = {post_id: make_post(post_id) for post_id in range(1, 5)}
+    for post in posts.values():
+        board.post_created(post)
+
+    for post_id, likes in [(2, 5), (4, 3), (1, 1)]:
+        posts[post_id].likes_count = likes
+        board.post_liked(posts[post_id])
+
+    assert [entry["post_id"] for entry in board.top(3)] == [2, 4, 1]
+
+    posts[2].likes_count = 0
+    board.post_unliked(posts[2])
+    board.post_deleted(4)
+    assert [entry["post_id"] for entry in board.top(2)] == [1, 2]
+
+
+def test_top_reloads_when_untracked_posts_may_rank_higher():
+    board = make_board(size=2)
+    rebuilds = []
+    board.rebuild = lambda db=None: rebuilds.append(db)
+    for post_id, likes in [(1, 5), (2, 4), (3, 3)]:
+        post = make_post(post_id, likes)
+        board.post_liked(post)
+
+    assert board.ceiling == 3
+    board.top(2)
+    assert rebuilds == []
+
+    board.post_deleted(1)
+    board.top(2)
+    assert rebuilds == [None]
+
+
+def test_trending_prefers_recent_likes():
+    board = make_board()
+    old, new = make_post(1, likes=3), make_post(2, likes=2)
+    for _ in range(3):
+        board.post_liked(old)
+    board.origin -= 3 * 6 * 3600  # three half-lives later
+    for _ in range(2):
+        board.post_liked(new)
+
+    trending = board.trending(2)
+    assert [entry["post_id"] for entry in trending] == [2, 1]
+    assert trending[0]["score"] > trending[1]["score"]
+
+
+def test_unlike_on_old_post_keeps_the_other_likes():
+    board = make_board()
+    post = make_post(1, likes=3)
+    for _ in range(3):
+        board.post_liked(post)
+    board.origin -= 2 * 6 * 3600  # two half-lives later
+    assert board.trending(1)[0]["score"] == pytest.approx(0.75)
+
+    post.likes_count = 2
+    board.post_unliked(post)
+    assert board.trending(1)[0]["score"] == pytest.approx(0.5)
+
+
+def test_rebuild_caps_seed_and_keeps_local_likes():
+    board = Leaderboard(size=3, refresh=3600)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    edited_old_post = SimpleNamespace(**vars(make_post(1, likes=5000)), updated_at=now)
+    fresh_post = SimpleNamespace(**vars(make_post(2, likes=8)), updated_at=now)
+    board._load_top = lambda db: [edited_old_post, fresh_post]
+    board._load_recent = lambda db: [edited_old_post, fresh_post]
+
+    board.rebuild(db=object())
+    scores = {entry["post_id"]: entry["score"] for entry in board.trending(2)}
+    assert scores[1] == pytest.approx(10, rel=0.01)
+    assert scores[2] == pytest.approx(8, rel=0.01)
+
+    # likes seen by this worker are kept when the refresh seed is lower
+    for _ in range(20):
+        board.post_liked(fresh_post)
+    board.rebuild(db=object())
+    assert [entry["post_id"] for entry in board.trending(2)] == [2, 1]
+
+
+def test_rebuild_replays_updates_made_while_loading():
+    board = Leaderboard(size=3, refresh=3600)
+    loaded = [make_post(1, likes=5), make_post(2, likes=4), make_post(3, likes=3)]
+    for post in loaded:
+        post.updated_at = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    def load_top(db):
+        # handled by this worker after the DB was read
+        board.post_liked(make_post(3, likes=6))
+        board.post_deleted(1)
+        board.post_created(make_post(4))
+        return list(loaded)
+
+    board._load_top = load_top
+    board._load_recent = lambda db: list(loaded)
+    board.rebuild(db=object())
+
+    assert [(entry["post_id"], entry["likes_count"]) for entry in board.top(3)] == [(3, 6), (2, 4), (4, 0)]
+    assert 1 not in {entry["post_id"] for entry in board.trending(3)}
+    assert board.pending is None
@@ -1,6 +1,10 @@
 from fastapi.testclient import TestClient  # type: ignore
 from backend.main import app  # type: ignore
+from backend.db.database import engine  # type: ignore
+from sqlalchemy import DateTime, bindparam, text  # type: ignore
+from datetime import datetime
 import pytest  # type: ignore
+import uuid
 
 client = TestClient(app)
 
@@ -21,3 +25,47 @@ def test_register_and_login():
     response = client.post("/login", data=login_data)
     assert response.status_code == 200
     assert "access_token" in response.json()
+
+
+def test_me_with_bounded_posts():
+    user_data = {"login": f"author_{uuid.uuid4().hex[:8]}", "password": "author"}
+    token = client.post("/register", json=user_data).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    for i in range(5):
+        client.post("/api/posts", json={"title": f"post {i}", "content": "content"}, headers=headers)
+    user_id = client.get("/api/me?include_posts=false", headers=headers).json()["user_id"]
+    # same created_at for every post: pages have to be split by post_id;
+    # typed like the column, so every driver stores it the way the app binds it
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE posts SET created_at = :created_at WHERE user_id = :user_id")
+            .bindparams(bindparam("created_at", type_=DateTime)),
+            {"created_at": datetime(2026, 1, 1), "user_id": user_id}
+        )
+
+    response = client.get("/api/me?posts_limit=2", headers=headers)
+    assert response.status_code == 200
+    seen = [post["post_id"] for post in response.json()["posts"]]
+    cursor = response.json()["next_cursor"]
+    assert len(seen) == 2
+
+    pages = 1
+    while cursor is not None and pages < 10:
+        response = client.get(f"/api/me/posts?limit=2&cursor={cursor}", headers=headers)
+        assert response.status_code == 200
+        seen += [post["post_id"] for post in response.json()["posts"]]
+        cursor = response.json()["next_cursor"]
+        pages += 1
+
+    assert cursor is None
+    assert pages == 3
+    assert seen == sorted(seen, reverse=True)
+    assert len(seen) == len(set(seen)) == 5
+
+    response = client.get("/api/me?include_posts=false", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["posts"] is None
+
+    response = client.get("/api/me/posts?cursor=invalid", headers=headers)
+    assert response.status_code == 400
@@ -0,0 +1,85 @@
+from backend.cache.singleflight import SingleFlight, flight_key  # type: ignore
+from fastapi import HTTPException  # type: ignore
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+import time
+import pytest  # type: ignore
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    release = Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        release.wait(timeout=5)
+        return b"result"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(flight.do, "key", loader) for _ in range(8)]
+        deadline = time.monotonic() + 5
+        while flight.stats()["shared"] < 7 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == [b"result"] * 8
+    assert len(calls) == 1
+    assert flight.stats() == {"executed": 1, "shared": 7, "timeouts": 0, "in_flight": 0}
+
+
+def test_error_is_not_remembered():
+    flight = SingleFlight()
+
+    def failing():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("key", failing)
+    assert flight.do("key", lambda: b"ok") == b"ok"
+
+
+def test_waiters_get_their_own_exception():
+    flight = SingleFlight()
+    release = Event()
+
+    def not_found():
+        release.wait(timeout=5)
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(flight.do, "key", not_found) for _ in range(3)]
+        deadline = time.monotonic() + 5
+        while flight.stats()["shared"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        release.set()
+        errors = [future.exception() for future in futures]
+
+    assert all(isinstance(error, HTTPException) and error.status_code == 404 for error in errors)
+    assert len({id(error) for error in errors}) == 3
+
+
+def test_waiter_runs_loader_after_timeout():
+    flight = SingleFlight(timeout=0.05)
+    release = Event()
+
+    def stuck():
+        release.wait(timeout=5)
+        return b"late"
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "key", stuck)
+        deadline = time.monotonic() + 5
+        while not flight.calls and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert flight.do("key", lambda: b"direct") == b"direct"
+        release.set()
+        assert leader.result() == b"late"
+
+    assert flight.stats()["timeouts"] == 1
+
+
+def test_flight_key_viewer():
+    assert flight_key("posts") == "posts"
+    assert flight_key("posts", viewer="token-1") != flight_key("posts", viewer="token-2")